@@ -17,15 +17,111 @@ HOW THE FRONTEND COMMUNICATES WITH THIS SERVER:
   understand natively.
 
 DEPENDENCIES:
-  pip install flask flask-cors requests
+  pip install flask flask-cors flask-compress requests orjson
 """
 
-from flask import Flask, jsonify, request
-from flask_cors import CORS
+import contextlib
+import functools
+import logging
+import os
+import tempfile
+import threading
+import time
+
+try:
+    # File locking, used so only one gunicorn worker refreshes at a time.
+    # It only exists on Unix; when running locally on Windows there's just
+    # one process anyway, so we can do without it.
+    import fcntl
+except ImportError:
+    fcntl = None
+
+import orjson
 
 # Import our parsing and checking functions from the parser module we built.
 # This assumes app.py and wiki_parser.py are in the same directory.
-from wiki_parser import fetch_wikitext, parse_top_countries, check_guess, parse_top_populations
+from wiki_parser import fetch_wikitext, parse_top_rows, normalise_guess
+
+
+# Log INFO and above (startup, refreshes, warnings, errors). The parser's
+# per-country DEBUG lines are skipped; switch to logging.DEBUG to see them.
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger(__name__)
+
+
+# ---------------------------------------------------------------------------
+# Start downloading the Wikipedia article early
+# ---------------------------------------------------------------------------
+
+# Where the parsed country data is saved between restarts, and how long a
+# saved copy stays usable (see "Cache the country list on startup" below).
+CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache.json")
+CACHE_MAX_AGE = 24 * 60 * 60     # 24 hours
+
+
+def _cache_file_is_fresh() -> bool:
+    """
+    Quick check of whether cache.json was written less than CACHE_MAX_AGE
+    seconds ago, going by the file's modification time.
+    """
+    try:
+        return time.time() - os.path.getmtime(CACHE_PATH) < CACHE_MAX_AGE
+    except OSError:
+        return False
+
+
+_prefetch_result = {}
+
+
+def _prefetch_wikitext() -> None:
+    # Runs in the background thread started below. Any error is kept and
+    # raised again later by _take_prefetched_wikitext().
+    try:
+        _prefetch_result["wikitext"] = fetch_wikitext()
+    except Exception as e:
+        _prefetch_result["error"] = e
+
+
+# Downloading the article takes a second or so, and importing Flask and its
+# extensions below also takes a noticeable fraction of a second. If we're
+# going to need the download (there's no fresh cache file), we start it now
+# in a background thread so the two happen at the same time. The startup
+# code further down waits for it with .join() before using the data, so
+# it's always finished before gunicorn forks the workers.
+if _cache_file_is_fresh():
+    _prefetch_thread = None
+else:
+    _prefetch_thread = threading.Thread(target=_prefetch_wikitext, daemon=True)
+    _prefetch_thread.start()
+
+# These imports come after starting the download on purpose (see above)
+from flask import Flask, Response, request
+from flask.json.provider import DefaultJSONProvider
+from flask_compress import Compress
+from flask_cors import CORS
+
+
+# ---------------------------------------------------------------------------
+# JSON encoding
+# ---------------------------------------------------------------------------
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Makes Flask use orjson instead of Python's built-in json module.
+
+    Anything Flask turns into JSON itself (jsonify(), returning a dict from a
+    route) goes through app.json, so swapping the provider speeds all of it
+    up. orjson is written in Rust and serialises our small responses several
+    times faster than the standard library.
+    """
+
+    def dumps(self, obj, **kwargs) -> str:
+        # orjson returns bytes; Flask expects a str here, so decode it.
+        # OPT_NON_STR_KEYS allows non-string dictionary keys, matching json.
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
 
 
 # ---------------------------------------------------------------------------
@@ -36,14 +132,48 @@ from wiki_parser import fetch_wikitext, parse_top_countries, check_guess, parse_
 # __name__ tells Flask where to look for resources relative to this file.
 app = Flask(__name__)
 
+# Route all JSON encoding/decoding through orjson (see OrjsonProvider above).
+app.json = OrjsonProvider(app)
+
 # Enable CORS (Cross-Origin Resource Sharing).
 # By default, browsers block requests from one domain to another for security
 # reasons. Since our frontend is hosted on GitHub Pages (one domain) and our
 # backend is on Render (a different domain), we need to explicitly allow this.
-# CORS(app) permits all origins — fine for a personal project, but in a
-# production app you'd restrict this to your specific frontend URL like:
-#   CORS(app, origins=["https://yourusername.github.io"])
-CORS(app)
+#
+# We only allow the origins the quiz is actually served from: GitHub Pages,
+# plus VS Code Live Server's default address for playing locally (see the
+# README). Add your own origin here if you serve index.html somewhere else.
+#
+# Before a POST with a JSON body the browser sends a "preflight" OPTIONS
+# request to ask permission. max_age lets it remember the answer for 24 hours
+# instead of asking again before every guess.
+ALLOWED_ORIGINS = [
+    "https://victornorton.github.io",
+    "http://127.0.0.1:5500",
+    "http://localhost:5500",
+]
+CORS(
+    app,
+    origins=ALLOWED_ORIGINS,
+    methods=["GET", "POST"],
+    allow_headers=["Content-Type"],
+    max_age=86400
+)
+
+# Compress JSON responses (gzip/brotli) for clients that send an
+# Accept-Encoding header saying they can handle it — every modern browser
+# does. JSON is very repetitive text, so it shrinks a lot. Tiny responses
+# (under COMPRESS_MIN_SIZE bytes) are sent as-is since compressing them
+# isn't worth the effort.
+app.config["COMPRESS_MIMETYPES"] = ["application/json"]
+app.config["COMPRESS_LEVEL"] = 6
+app.config["COMPRESS_MIN_SIZE"] = 200
+Compress(app)
+
+# A guess is just a country name, so any request body bigger than this is
+# refused straight away (Flask replies "413 Payload Too Large") instead of
+# being read into memory.
+app.config["MAX_CONTENT_LENGTH"] = 1024
 
 
 # ---------------------------------------------------------------------------
@@ -55,19 +185,337 @@ CORS(app)
 # to repeat the expensive work of fetching and parsing the article each time
 # a user makes a guess.
 #
-# top_countries will be a list of normalised (lowercase) country name strings,
-# e.g. ["china", "india", "united states", ...]
-print("Fetching and parsing Wikipedia data on startup...")
-try:
-    _wikitext = fetch_wikitext()
-    top_countries = parse_top_countries(_wikitext)
-    top_populations = parse_top_populations(_wikitext)
-    print(f"Ready. Cached {len(top_countries)} countries.")
-except Exception as e:
-    # If this fails the server will still start, but the endpoints will return
-    # an error. Check your internet connection and Wikipedia API access.
-    top_countries = []
-    print(f"ERROR: Failed to fetch country data on startup: {e}")
+# This happens at import time, so when gunicorn preloads the app the work
+# is done once in the master process and every worker shares the resulting
+# data in memory instead of fetching its own copy. Request handlers only
+# ever read these module-level variables — writing to them would make each
+# worker take a private copy of that memory.
+#
+# The parsed result is also saved to a small JSON file on disk. If the server
+# restarts within CACHE_MAX_AGE seconds it loads that file instead of asking
+# Wikipedia again, so it's ready almost instantly. Otherwise it fetches before
+# the workers start, so that's still only one download per deploy.
+#
+# While the server is running, a background timer in each worker fetches
+# fresh data once the data in memory is REFRESH_INTERVAL seconds old. The
+# workers take turns using a lock file (REFRESH_LOCK_PATH): the first one
+# fetches and saves cache.json, and the rest just re-read that file.
+REFRESH_LOCK_PATH = CACHE_PATH + ".lock"
+REFRESH_INTERVAL = 12 * 60 * 60  # 12 hours
+
+
+def _read_cache():
+    """
+    Loads the country data saved by _fetch_and_cache(), if there is any.
+
+    Returns:
+        A (countries, populations, fetched_at) tuple, or None if the cache
+        file is missing, unreadable, empty, or older than CACHE_MAX_AGE.
+        fetched_at is the time.time() at which the data was downloaded.
+    """
+    try:
+        with open(CACHE_PATH, "rb") as f:
+            cached = orjson.loads(f.read())
+        fetched_at = cached["fetched_at"]
+        if time.time() - fetched_at >= CACHE_MAX_AGE:
+            return None
+        countries, populations = cached["countries"], cached["populations"]
+    except (OSError, KeyError, TypeError, orjson.JSONDecodeError):
+        return None
+
+    # Caches written by older versions stored populations as formatted
+    # strings like "1,417,492,000"; ignore those and fetch fresh data.
+    if not countries or not all(isinstance(p, int) for p in populations):
+        return None
+    return countries, populations, fetched_at
+
+
+def _fetch_and_cache(wikitext: str | None = None):
+    """
+    Fetches and parses the Wikipedia article, then saves the result to
+    CACHE_PATH for the next startup.
+
+    Args:
+        wikitext: The article, if it has already been downloaded (see
+                  _take_prefetched_wikitext). Fetched here if None.
+
+    Returns:
+        A (countries, populations, fetched_at) tuple.
+    """
+    if wikitext is None:
+        wikitext = fetch_wikitext()
+    fetched_at = time.time()
+    # One pass over the table gives us both lists, in the same rank order
+    countries, populations = parse_top_rows(wikitext)
+
+    if countries:
+        # Write to a temporary file first and then swap it into place, so a
+        # crash halfway through writing can never leave a corrupt cache file.
+        # Each writer gets its own uniquely named temporary file (in the same
+        # folder, so os.replace() is a simple rename), so two processes saving
+        # at once can't write over each other's half-finished file.
+        tmp_path = None
+        try:
+            with tempfile.NamedTemporaryFile(
+                "wb",
+                dir=os.path.dirname(CACHE_PATH),
+                prefix=os.path.basename(CACHE_PATH) + ".",
+                suffix=".tmp",
+                delete=False
+            ) as f:
+                tmp_path = f.name
+                f.write(orjson.dumps({
+                    "countries": countries,
+                    "populations": populations,
+                    "fetched_at": fetched_at
+                }))
+            os.replace(tmp_path, CACHE_PATH)
+        except OSError as e:
+            # Not fatal — we still have the data in memory
+            log.warning("Could not write cache file %s: %s", CACHE_PATH, e)
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    return countries, populations, fetched_at
+
+
+def _set_country_data(countries: list[str], populations: list[int], fetched_at: float = 0.0) -> None:
+    """
+    Stores freshly loaded country data in the module-level variables the
+    endpoints read from.
+
+    top_countries will be a list of normalised (lowercase) country name strings,
+    e.g. ["china", "india", "united states", ...]
+    fetched_at is when the data was downloaded from Wikipedia (0 if never).
+    """
+    global top_countries, top_populations, _COUNTRIES_BLOB, _check_cached, _fetched_at
+
+    # There are only 20 possible correct answers, so we build the full JSON
+    # reply for each one up front and map the country name straight to it.
+    # A correct guess then needs a single dictionary lookup and no encoding:
+    #   {"india": b'{"correct":true,"rank":1,...}', "china": ..., ...}
+    name_to_blob = {
+        name: orjson.dumps({
+            "correct": True,
+            "rank": i + 1,
+            "normalised": name,
+            "population": populations[i]
+        })
+        for i, name in enumerate(countries)
+    }
+
+    # The country list only changes when we refresh, so there's no point
+    # building and encoding the same dictionary on every GET /countries. We
+    # turn it into JSON bytes once here and just send those bytes back.
+    countries_blob = orjson.dumps({
+        "countries": countries,
+        "populations": populations,
+        "count": len(countries)
+    })
+
+    # Every data set gets its own freshly cached checker (see _make_checker).
+    # A request that picked up the old checker just before this swap can only
+    # store its answer in the old checker's cache, never in the new one.
+    top_countries, top_populations, _COUNTRIES_BLOB, _check_cached, _fetched_at = (
+        countries, populations, countries_blob, _make_checker(name_to_blob), fetched_at
+    )
+
+
+def _make_checker(name_to_blob: dict[str, bytes]):
+    """
+    Builds the function that works out the JSON reply for a guess, using
+    the prepared replies in name_to_blob (see _set_country_data).
+
+    The returned function is wrapped in @functools.lru_cache, which remembers
+    the reply for the last 1024 different guess strings, so when lots of
+    players type the same thing (and they do) only the first one does any
+    work. Since a new checker is built for each data set, remembered replies
+    can never outlive the data they were worked out from.
+    """
+
+    @functools.lru_cache(maxsize=1024)
+    def check_cached(guess: str) -> bytes:
+        """
+        Args:
+            guess: The raw string the user typed, already validated.
+
+        Returns:
+            The JSON reply as bytes, e.g.
+              b'{"correct":true,"rank":7,"normalised":"brazil","population":213421037}'
+        """
+        # Clean up the guess the same way the country names were cleaned
+        normalised = normalise_guess(guess)
+
+        # Correct guesses already have their reply prepared
+        blob = name_to_blob.get(normalised)
+        if blob is not None:
+            return blob
+
+        return orjson.dumps({"correct": False, "rank": None, "normalised": normalised})
+
+    return check_cached
+
+
+@contextlib.contextmanager
+def _refresh_lock():
+    """
+    Holds an exclusive lock on REFRESH_LOCK_PATH for the duration of a
+    "with" block, so only one process refreshes at a time. The others wait
+    their turn.
+
+    The lock file also stores the time of the last fetch attempt, so a
+    process that gets the lock after another one can tell that the work has
+    already been done (see _refresh_periodically).
+
+    Yields:
+        The open lock file, or None if it couldn't be opened (e.g. a
+        read-only disk), in which case there's no coordination at all.
+    """
+    try:
+        lock_file = open(REFRESH_LOCK_PATH, "a+")
+    except OSError as e:
+        log.warning("Could not open lock file %s: %s", REFRESH_LOCK_PATH, e)
+        yield None
+        return
+
+    # Closing the file releases the lock
+    with lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield lock_file
+
+
+def _refresh_periodically() -> None:
+    """
+    Refreshes the Wikipedia data in the background, then schedules itself
+    to run again after REFRESH_INTERVAL seconds.
+
+    Every worker runs this at about the same time, so inside the lock only
+    the first one actually fetches. The others see from the lock file that
+    a fetch was attempted recently and just load what it saved to
+    cache.json. That includes a failed attempt, so a Wikipedia outage isn't
+    retried once per worker either.
+    """
+    try:
+        with _refresh_lock() as lock_file:
+            last_attempt = 0.0
+            if lock_file is not None:
+                lock_file.seek(0)
+                try:
+                    last_attempt = float(lock_file.read() or 0)
+                except ValueError:
+                    pass
+
+            if time.time() - last_attempt < REFRESH_INTERVAL:
+                cached = _read_cache()
+            else:
+                if lock_file is not None:
+                    lock_file.seek(0)
+                    lock_file.truncate()
+                    lock_file.write(str(time.time()))
+                    lock_file.flush()
+                cached = _fetch_and_cache()
+
+        if cached and cached[0] and cached[2] > _fetched_at:
+            _set_country_data(*cached)
+            log.info("Refreshed. Cached %d countries.", len(top_countries))
+    except Exception as e:
+        # Keep serving the data we already have
+        log.error("Failed to refresh country data: %s", e)
+
+    # Wait a full interval even after a failure, so we don't hammer Wikipedia
+    schedule_refresh(REFRESH_INTERVAL)
+
+
+def schedule_refresh(delay: float | None = None) -> None:
+    """
+    Starts the background timer that keeps the country data up to date.
+
+    Args:
+        delay: Seconds to wait before refreshing. By default the timer fires
+               once the current data is REFRESH_INTERVAL seconds old, or
+               right away if it already is (e.g. a cache file that was more
+               than REFRESH_INTERVAL old was loaded at startup).
+
+    This isn't called at import time. Under gunicorn's preload_app the app is
+    imported once in the master process and then forked into workers, and
+    a timer thread doesn't survive the fork. Instead each worker starts its
+    own timer from the post_fork hook in gunicorn.conf.py, and running
+    app.py directly starts one in the __main__ block below.
+    """
+    if delay is None:
+        delay = max(0.0, _fetched_at + REFRESH_INTERVAL - time.time())
+
+    # daemon=True means this timer won't stop the server from shutting down
+    timer = threading.Timer(delay, _refresh_periodically)
+    timer.daemon = True
+    timer.start()
+
+
+def _take_prefetched_wikitext():
+    """
+    Waits for the download started at the top of this file to finish.
+
+    Returns:
+        The wikitext, or None if no early download was started.
+
+    Raises:
+        Whatever exception the download raised, if it failed.
+    """
+    if _prefetch_thread is None:
+        return None
+
+    _prefetch_thread.join()
+    if "error" in _prefetch_result:
+        raise _prefetch_result["error"]
+    return _prefetch_result["wikitext"]
+
+
+_set_country_data([], [])
+
+# If the cache file looked stale, the download is already under way and the
+# saved copy isn't worth reading.
+_cached = _read_cache() if _prefetch_thread is None else None
+if _cached:
+    _set_country_data(*_cached)
+    log.info("Ready. Loaded %d countries from %s.", len(top_countries), CACHE_PATH)
+else:
+    log.info("Fetching and parsing Wikipedia data on startup...")
+    try:
+        _set_country_data(*_fetch_and_cache(_take_prefetched_wikitext()))
+        log.info("Ready. Cached %d countries.", len(top_countries))
+    except Exception as e:
+        # If this fails the server will still start, but the endpoints will return
+        # an error until the next refresh succeeds. Check your internet
+        # connection and Wikipedia API access.
+        log.error("Failed to fetch country data on startup: %s", e)
+
+
+# ---------------------------------------------------------------------------
+# Pre-serialise the constant responses
+# ---------------------------------------------------------------------------
+
+# The error replies never change, so we encode them once here rather than
+# on every failed request.
+_UNAVAILABLE_BLOB = orjson.dumps({"error": "Country data unavailable. Check server logs."})
+_BAD_REQUEST_BLOB = orjson.dumps({"error": "Request body must be JSON with a 'guess' field."})
+_BAD_GUESS_BLOB = orjson.dumps({"error": "'guess' must be a non-empty string."})
+_LONG_GUESS_BLOB = orjson.dumps({"error": "'guess' is too long to be a country name."})
+
+# The longest country name is well under this. Anything longer can't be a
+# correct answer, and we don't want to keep it in _check_cached()'s memory.
+MAX_GUESS_LENGTH = 100
+
+
+def _json_response(blob: bytes, status: int = 200) -> Response:
+    """
+    Wraps pre-serialised JSON bytes in a Flask Response.
+
+    A fresh (very cheap) Response is built per request rather than sharing one
+    object, because after_request hooks such as CORS add headers to whatever
+    response they are given.
+    """
+    return Response(blob, status=status, mimetype="application/json")
 
 
 # ---------------------------------------------------------------------------
@@ -90,17 +538,12 @@ def get_countries():
       }
     """
     if not top_countries:
-        # jsonify() converts a Python dictionary into a JSON HTTP response.
-        # The second argument (503) is the HTTP status code:
         # 503 means "Service Unavailable" — the server is up but can't fulfil
         # the request right now.
-        return jsonify({"error": "Country data unavailable. Check server logs."}), 503
+        return _json_response(_UNAVAILABLE_BLOB, 503)
 
-    return jsonify({
-        "countries": top_countries,
-        "populations": top_populations,
-        "count": len(top_countries)
-    })
+    # The JSON was already built when the data was loaded (see _set_country_data)
+    return _json_response(_COUNTRIES_BLOB)
 
 
 @app.route("/check", methods=["POST"])
@@ -115,36 +558,38 @@ def check():
       { "guess": "Brazil" }
 
     Example responses:
-      { "correct": true,  "rank": 7, "normalised": "brazil" }
+      { "correct": true,  "rank": 7, "normalised": "brazil", "population": 213421037 }
       { "correct": false, "rank": null, "normalised": "france" }
     """
     if not top_countries:
-        return jsonify({"error": "Country data unavailable. Check server logs."}), 503
-
-    # request.get_json() parses the JSON body sent by the frontend into a
-    # Python dictionary. If the body isn't valid JSON it returns None.
-    data = request.get_json()
-
-    if not data or "guess" not in data:
+        return _json_response(_UNAVAILABLE_BLOB, 503)
+
+    # Read the raw body and parse the JSON ourselves with orjson. This skips
+    # the extra checks request.get_json() does, which we don't need for a
+    # body this small. cache=False because we never read the body again.
+    # If the body is empty or isn't valid JSON, data is None.
+    raw = request.get_data(cache=False)
+    try:
+        data = orjson.loads(raw) if raw else None
+    except orjson.JSONDecodeError:
+        data = None
+
+    if not isinstance(data, dict) or "guess" not in data:
         # 400 means "Bad Request" — the client sent something we can't use.
-        return jsonify({"error": "Request body must be JSON with a 'guess' field."}), 400
+        return _json_response(_BAD_REQUEST_BLOB, 400)
 
     guess = data["guess"]
 
     # Defend against empty or non-string guesses
     if not isinstance(guess, str) or not guess.strip():
-        return jsonify({"error": "'guess' must be a non-empty string."}), 400
+        return _json_response(_BAD_GUESS_BLOB, 400)
 
-    # Use the check_guess function from our parser module
-    result = check_guess(guess, top_countries)
+    if len(guess) > MAX_GUESS_LENGTH:
+        return _json_response(_LONG_GUESS_BLOB, 400)
 
-    # jsonify() converts the result dictionary to a JSON response with
-    # HTTP status 200 (OK) by default
-
-    #add populatiion for correct guesses:
-    if result["correct"]:
-        result["population"] = top_populations[result["rank"] - 1]
-    return jsonify(result)
+    # Most guesses are ones we've seen before, so the finished reply usually
+    # comes straight out of _check_cached()'s memory.
+    return _json_response(_check_cached(guess))
 
 
 # ---------------------------------------------------------------------------
@@ -152,8 +597,19 @@ def check():
 # ---------------------------------------------------------------------------
 
 if __name__ == "__main__":
-    # debug=True enables helpful error messages in the browser and auto-reloads
-    # the server when you save changes to the file. Turn this OFF in production.
+    # app.run() starts Flask's built-in development server, which handles one
+    # request at a time. That's fine for trying things out locally, but in
+    # production (e.g. on Render) the app is served by gunicorn instead:
+    #   gunicorn app:app
+    # gunicorn.conf.py sets it up with 2 worker processes and 4 threads each,
+    # so several users' guesses can be handled at the same time, and with
+    # preload_app so this module is loaded once before the workers are
+    # started and Wikipedia is only fetched once.
+    #
+    # Set debug=True while developing to get helpful error messages in the
+    # browser and auto-reloading when you save changes. Never use it in
+    # production.
     #
     # The server will be accessible at http://127.0.0.1:5000 while running locally.
-    app.run(debug=True)
\ No newline at end of file
+    schedule_refresh()
+    app.run(debug=False)
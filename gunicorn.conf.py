@@ -0,0 +1,37 @@
+"""
+gunicorn.conf.py
+----------------
+Settings gunicorn picks up automatically when it is started from this
+directory, so the start command on Render (or any other host) only needs to be:
+    gunicorn app:app
+
+With preload_app, app.py is imported once in the master process and the
+workers are forked from it, so they all share the cached country data.
+Background threads don't survive that fork, which is why each worker starts
+its own refresh timer here instead of app.py doing it at import time.
+"""
+
+import os
+
+
+# 2 worker processes with 4 threads each, so several users' guesses can be
+# handled at the same time instead of one after another.
+workers = 2
+worker_class = "gthread"
+threads = 4
+
+# Listen on every network interface, on the port the host tells us to use
+# (Render sets $PORT). 8000 is gunicorn's usual default for local runs.
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+# Same as passing --preload: fetch and parse the Wikipedia data once in the
+# master process, then fork the workers so they share it (see above).
+preload_app = True
+
+
+def post_fork(server, worker):
+    # The app module was already imported by the master, so this import just
+    # picks up the existing module rather than loading it again.
+    import app
+
+    app.schedule_refresh()
@@ -16,8 +16,16 @@ DEPENDENCIES:
   pip install requests
 """
 
+import logging
 import re
+
 import requests
+from requests.adapters import HTTPAdapter
+
+
+# Messages go through the logging module rather than print(), so the server
+# decides how much detail it wants (see logging.basicConfig in app.py).
+log = logging.getLogger(__name__)
 
 
 # ---------------------------------------------------------------------------
@@ -38,6 +46,13 @@ WIKIPEDIA_API_URL = (
     "&format=json"
 )
 
+# Wikipedia's API requires a descriptive User-Agent header, or it returns 403.
+# This is part of their API etiquette policy. The string should identify your
+# app and provide a contact point. Adjust the name/email to your own details.
+HEADERS = {
+    "User-Agent": "PopulationQuizApp/1.0 (https://github.com/victornorton/113proj2; vanorton@andrew.cmu.edu)"
+}
+
 # How many top entries we want to extract
 TOP_N = 20
 
@@ -65,6 +80,14 @@ ALIASES = {
 }
 
 
+# A Session keeps its connection to Wikipedia open between requests
+# ("keep-alive"), so when the server refreshes its data later it can skip
+# the DNS lookup and TLS handshake and reuse the existing connection.
+# We only ever talk to one host, so one small connection pool is plenty.
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+
+
 # ---------------------------------------------------------------------------
 # Step 1: Fetch the raw wikitext from Wikipedia
 # ---------------------------------------------------------------------------
@@ -80,22 +103,15 @@ def fetch_wikitext() -> str:
     Raises:
         RuntimeError if the request fails or the expected data isn't found.
     """
-    print("Fetching article from Wikipedia API...")
-
-    # Wikipedia's API requires a descriptive User-Agent header, or it returns 403.
-    # This is part of their API etiquette policy. The string should identify your
-    # app and provide a contact point. Adjust the name/email to your own details.
-    headers = {
-        "User-Agent": "PopulationQuizApp/1.0 (https://github.com/victornorton/113proj2; vanorton@andrew.cmu.edu)"
-    }
+    log.info("Fetching article from Wikipedia API...")
 
-    # requests.get() sends an HTTP GET request — like your browser visiting a URL.
+    # _SESSION.get() sends an HTTP GET request — like your browser visiting a URL.
     # The response object holds the status code and body of the reply.
-    response = requests.get(WIKIPEDIA_API_URL, headers=headers, timeout=10)
+    response = _SESSION.get(WIKIPEDIA_API_URL, headers=HEADERS, timeout=10)
 
     # HTTP status 200 means "OK". Anything else (404, 500, etc.) is a problem.
     if response.status_code != 200:
-        print(response.text[:500])
+        log.error("%s", response.text[:500])
         raise RuntimeError(
             f"Wikipedia API returned status code {response.status_code}. "
             "Check your internet connection or the article name."
@@ -113,122 +129,119 @@ def fetch_wikitext() -> str:
             "Unexpected API response structure. Wikipedia may have changed its format."
         )
 
-    print(f"Successfully fetched wikitext ({len(wikitext):,} characters).")
+    log.info("Successfully fetched wikitext (%d characters).", len(wikitext))
     return wikitext
 
 
 # ---------------------------------------------------------------------------
-# Step 2: Parse the wikitext to extract country names
+# Step 2: Parse the wikitext to extract country names and populations
 # ---------------------------------------------------------------------------
 
-def parse_top_countries(wikitext: str, top_n: int = TOP_N) -> list[str]:
-    # Split the wikitext into table rows. Each row begins with "|-"
-    rows = wikitext.split("|-")
-
-    # This pattern matches Wikipedia internal links of the form:
-    # [[Some Article Title|Display Name]]
-    # We capture the display name (the part after the "|")
-    # The \[\[ and \]\] match literal double square brackets
-    link_pattern = re.compile(r"\[\[[^\]]+\|([^\]]+)\]\]")
-
-    # This pattern checks whether a row contains a flagicon template,
-    # which is how we identify rows that represent a country.
-    # Every country row starts with {{flagicon|Country Name}}
-    flagicon_pattern = re.compile(r"\{\{flagicon\|", re.IGNORECASE)
-
-    countries = []
-
-    for row in rows:
-        if len(countries) >= top_n:
-            break
-
-        # Skip rows that don't contain a flagicon — these are headers,
-        # footers, or other non-country rows
-        if not flagicon_pattern.search(row):
-            continue
-
-        # Find all internal links in this row and take the first one,
-        # which corresponds to the country name
-        matches = link_pattern.findall(row)
-        if not matches:
-            continue
-
-        country_name = matches[0].strip().lower()
-        country_name = normalise_guess(country_name) #had to add this after wikipedia changed drc!
-        countries.append(country_name)
-        print(f"  #{len(countries):>2}: {country_name}")
-
-    if len(countries) < top_n:
-        print(
-            f"\nWARNING: Only found {len(countries)} countries instead of {top_n}. "
-            "You may need to inspect more rows in wikitext_sample.txt."
-        )
-
-    return countries
+# A single pattern that picks out everything we need from a country row,
+# so each row is scanned once instead of three times. It's compiled once
+# here at import time rather than every time the parser runs:
+# \{\{flagicon\|           → the row must contain a flagicon template,
+#                            which is how we identify rows that represent a
+#                            country (headers/footers don't have one)
+# .*?                      → skip ahead as little as possible
+# \[\[[^\]]+\|([^\]]+)\]\] → the first internal link [[Title|Name]] after
+#                            the flag; CAPTURE GROUP 1 is the display name
+# .*?                      → skip ahead again
+# \{\{n\+p\|(\d+)\|        → the {{n+p|...}} population template;
+#                            CAPTURE GROUP 2 is the raw number
+# DOTALL lets "." match newlines, since a row spans several lines.
+_ROW_RE = re.compile(
+    r"\{\{flagicon\|.*?\[\[[^\]]+\|([^\]]+)\]\].*?\{\{n\+p\|(\d+)\|",
+    re.DOTALL | re.IGNORECASE,
+)
 
 
-def parse_top_populations(wikitext: str, top_n: int = TOP_N) -> list[str]:
+def _iter_rows(wikitext: str):
     """
-    Parses the wikitext to extract the population figure for each of the
-    top N countries, in the same rank order as parse_top_countries().
+    Yields the table rows of the wikitext one at a time. Each row begins
+    with "|-".
 
-    The population figures are stored in the wikitext inside templates like:
-        {{n+p|341784857|{{worldpop}}|sigfig=2|disp=table}}
-    We extract the first argument (the raw number) from each such template.
-
-    Returns a list of population strings in rank order, e.g.:
-        ["1,419,321,278", "1,407,563,842", ...]
-    The figures are formatted with commas for readability.
+    This gives the same pieces as wikitext.split("|-"), but only cuts out a
+    row when the loop asks for it. Since we stop after the top 20 countries,
+    the hundreds of rows further down the article are never copied.
     """
+    start = 0
+    while True:
+        end = wikitext.find("|-", start)
+        if end == -1:
+            yield wikitext[start:]
+            return
+        yield wikitext[start:end]
+        start = end + 2
 
-    # This pattern matches the n+p template and captures the raw number.
-    # \{\{n\+p\|  → matches the literal opening "{{n+p|"
-    # (\d+)       → CAPTURE GROUP: the population number (digits only)
-    # \|          → matches the "|" that follows the number
-    population_pattern = re.compile(r"\{\{n\+p\|(\d+)\|")
-
-    # Reuse the same row-splitting and flagicon-detection logic as
-    # parse_top_countries() so we're iterating over exactly the same rows
-    # in the same order, guaranteeing the two lists stay in sync.
-    flagicon_pattern = re.compile(r"\{\{flagicon\|", re.IGNORECASE)
 
-    rows = wikitext.split("|-")
+def parse_top_rows(wikitext: str, top_n: int = TOP_N) -> tuple[list[str], list[int]]:
+    """
+    Parses the wikitext to extract the name and population of each of the
+    top N countries in a single pass over the table rows.
+
+    Each country row in the table looks roughly like:
+        | {{flagicon|India}} [[India|India]] || {{n+p|1417492000|{{worldpop}}|...}}
+    We pick out the display name from the first [[link|Name]] and the raw
+    number from the {{n+p|...}} template.
+
+    Returns a tuple of two lists in rank order:
+        (["india", "china", ...], [1417492000, 1404890000, ...])
+    Names are normalised; population figures are plain integers (the
+    frontend adds the commas when it displays them).
+    Both lists always have the same length, since a row is only kept if we
+    found both its name and its population.
+    """
+    countries = []
     populations = []
 
-    for row in rows:
-        if len(populations) >= top_n:
+    for row in _iter_rows(wikitext):
+        if len(countries) >= top_n:
             break
 
-        if not flagicon_pattern.search(row):
+        # Skip rows that aren't a complete country entry — headers, footers,
+        # or rows missing a name or population
+        row_match = _ROW_RE.search(row)
+        if not row_match:
             continue
 
-        pop_match = population_pattern.search(row)
-        if not pop_match:
-            continue
+        country_name = row_match.group(1).strip().lower()
+        country_name = normalise_guess(country_name) #had to add this after wikipedia changed drc!
+        countries.append(country_name)
 
-        # Format the raw number string with commas for readability
-        # e.g. "341784857" → "341,784,857"
-        raw_number = int(pop_match.group(1))
-        formatted  = f"{raw_number:,}"
-        populations.append(formatted)
+        # Store the population as a number, e.g. "341784857" → 341784857
+        populations.append(int(row_match.group(2)))
+        # Passing the values as arguments (instead of an f-string) means the
+        # message is only formatted if debug logging is actually switched on
+        log.debug("  #%2d: %s", len(countries), country_name)
 
-    if len(populations) < top_n:
-        print(
-            f"WARNING: Only found {len(populations)} population figures "
-            f"instead of {top_n}. Check the wikitext structure."
+    if len(countries) < top_n:
+        log.warning(
+            "Only found %d countries instead of %d. "
+            "You may need to inspect more rows in wikitext_sample.txt.",
+            len(countries), top_n
         )
 
-    return populations
+    return countries, populations
+
 
 # ---------------------------------------------------------------------------
 # Step 3: Normalise a user's guess for comparison
 # ---------------------------------------------------------------------------
 
+# A character translation table for str.translate(), which swaps or deletes
+# characters in one fast pass over the string:
+#   . , ' -  → deleted   (so "U.S.A." becomes "usa", which is an alias)
+#   _ /      → a space
+_TRANSLATE = str.maketrans({c: None for c in ".,'-"} | {c: " " for c in "_/"})
+
+
 def normalise_guess(guess: str) -> str:
     """
     Cleans up a user's guess so it can be fairly compared against our list.
 
     Steps:
+      - Remove punctuation (see _TRANSLATE above)
       - Strip leading/trailing whitespace
       - Convert to lowercase
       - Check the ALIASES dictionary for known alternate names
@@ -239,27 +252,27 @@ def normalise_guess(guess: str) -> str:
     Returns:
         A normalised string ready for comparison.
     """
-    cleaned = guess.strip().lower()
+    cleaned = guess.translate(_TRANSLATE).strip().lower()
 
     # If the user typed a known alias (e.g. "USA"), replace it with the
-    # canonical form (e.g. "united states") before checking
-    if cleaned in ALIASES:
-        cleaned = ALIASES[cleaned]
-
-    return cleaned
+    # canonical form (e.g. "united states") before checking. .get() falls
+    # back to the cleaned guess itself when it isn't an alias.
+    return ALIASES.get(cleaned, cleaned)
 
 
 # ---------------------------------------------------------------------------
 # Step 4: The main checking function (this is what Flask will call later)
 # ---------------------------------------------------------------------------
 
-def check_guess(guess: str, top_countries: list[str]) -> dict:
+def check_guess(guess: str, country_rank: dict[str, int]) -> dict:
     """
     Checks whether a user's guess is in the top 20 countries list.
 
     Args:
-        guess:         The raw string the user typed.
-        top_countries: The normalised list returned by parse_top_countries().
+        guess:        The raw string the user typed.
+        country_rank: A dictionary mapping each normalised country name from
+                      parse_top_rows() to its 1-based rank, e.g.
+                      {"india": 1, "china": 2, ...}
 
     Returns:
         A dictionary with:
@@ -269,12 +282,10 @@ def check_guess(guess: str, top_countries: list[str]) -> dict:
     """
     normalised = normalise_guess(guess)
 
-    if normalised in top_countries:
-        # list.index() returns the 0-based position; add 1 for human-readable rank
-        rank = top_countries.index(normalised) + 1
-        return {"correct": True, "rank": rank, "normalised": normalised}
-    else:
-        return {"correct": False, "rank": None, "normalised": normalised}
+    # A single dictionary lookup tells us both whether the guess is correct
+    # and its rank. .get() returns None when the name isn't a key.
+    rank = country_rank.get(normalised)
+    return {"correct": rank is not None, "rank": rank, "normalised": normalised}
 
 
 # ---------------------------------------------------------------------------
@@ -282,6 +293,9 @@ def check_guess(guess: str, top_countries: list[str]) -> dict:
 # ---------------------------------------------------------------------------
 
 if __name__ == "__main__":
+    # Show the debug messages too, including each country as it's parsed
+    logging.basicConfig(level=logging.DEBUG, format="%(message)s")
+
     # Fetch and parse the list
     wikitext = fetch_wikitext()
     # Temporary diagnostic — remove once regex is fixed
@@ -291,7 +305,7 @@ if __name__ == "__main__":
 
 
     print("\nParsing top 20 countries...\n")
-    top_countries = parse_top_countries(wikitext)
+    top_countries, populations = parse_top_rows(wikitext)
 
 
     print(f"\nFinal list ({len(top_countries)} countries):")
@@ -300,14 +314,14 @@ if __name__ == "__main__":
 
     # Test a few guesses
     print("\nTesting guess checks:")
+    country_rank = {name: i + 1 for i, name in enumerate(top_countries)}
     test_guesses = ["India", "USA", "usa", "France", "DR Congo", "  pakistan  "]
     for g in test_guesses:
-        result = check_guess(g, top_countries)
+        result = check_guess(g, country_rank)
         status = f"CORRECT (rank #{result['rank']})" if result["correct"] else "WRONG"
         print(f"  '{g}' → normalised to '{result['normalised']}' → {status}")
 
     #human written test:
     print("\nTesting Population:\n")
-    pop = parse_top_populations(wikitext)
-    for x in pop:
-        print(f"{x}\n")
+    for x in populations:
+        print(f"{x:,}\n")